@@ -7,6 +7,10 @@ import re
 import os
 import glob
 import signal
+import shlex
+import codecs
+import collections
+import sys
 
 # --- Configuration Constants ---
 # Assuming 25 frames per second (PAL standard, common for VHS)
@@ -14,17 +18,48 @@ FPS = 25.0
 # The executable name (must be in the system PATH or a full path provided by user)
 VHS_DECODE_COMMAND = "vhs-decode"
 CONFIG_FILE_NAME = "vhs_decode_config.txt" # File to save command arguments
-
-# Regex patterns for parsing vhs-decode output
-FRAME_PATTERN = re.compile(r"File Frame (\d+): VHS")
+CONFIG_SAVE_TIMEOUT = 1.0 # Seconds the window waits for the config write on close (exit still waits for it)
+# Weight of the newest sample in the smoothed decode FPS (exponentially weighted moving average)
+FPS_SMOOTHING = 0.2
+# Subprocess output is read in chunks of this many bytes rather than line by line
+READ_CHUNK_SIZE = 65536
+# Line breaks in subprocess output: only '\r\n', '\r' and '\n' (like universal newlines), captured for splitting
+LINE_BREAK_PATTERN = re.compile(r"(\r\n|\r|\n)")
+# How often (ms) the GUI thread drains output queued by the worker threads
+GUI_QUEUE_INTERVAL_MS = 100
+# Maximum number of subprocess output lines shown per GUI tick; the newest are kept, older ones counted as suppressed
+LOG_LINES_PER_TICK = 200
+# Delay (ms) before auto-scrolling the log; further inserts in the meantime share one scroll
+LOG_SCROLL_DELAY_MS = 50
+# Maximum number of lines kept in the log area; older lines are trimmed from the top
+MAX_LOG_LINES = 10000
+# Number of logged lines between checks of the log area size
+LOG_TRIM_INTERVAL = 500
+
+# Patterns for parsing vhs-decode output
+# Frame lines look like "File Frame <number>: VHS ..."
+FRAME_PREFIX = "File Frame "
+FRAME_SUFFIX = ": VHS"
 # Updated to match any line containing the text "dropping field"
 DROPPED_FIELD_PATTERN = "dropping field"
 # Updated to match any line containing the text "skipped a track"
 TRACK_SKIP_PATTERN = "skipped a track"
-ANSI_ESCAPE_PATTERN = re.compile(r'\x1B\[[0-?]*[ -/]*[@-~]')
+# Regex pattern for parsing tbc-video-export progress output
+EXPORT_PROGRESS_PATTERN = re.compile(r"Info:\s+(\d+)\s+frames processed\s+-\s+([\d.]+)\s+FPS")
+
+# Regex pattern for reading a key="value" setting from a (stripped) config file line
+CONFIG_ENTRY_PATTERN = re.compile(r'^(\w+)="(.*)"$')
+# Config file keys
+DECODE_ARGS_CONFIG_KEY = "vhsdecodeArguments"
+EXPORT_ARGS_CONFIG_KEY = "videoExportArguments"
 
 # --- Utility Functions ---
 
+# Lookup tables for timecode formatting: "HH:MM" for every minute of a day and "FF" for every frame
+FRAMES_PER_SECOND = int(FPS)
+MINUTE_STRINGS = [f"{m // 60:02d}:{m % 60:02d}" for m in range(24 * 60)]
+FRAME_STRINGS = [f"{f:02d}" for f in range(FRAMES_PER_SECOND)]
+
 def convert_frame_to_timecode(frame_number):
     """Converts a frame number (at 25 FPS) to HH:MM:SS.FF format."""
     try:
@@ -33,15 +68,96 @@ def convert_frame_to_timecode(frame_number):
         return "00:00:00.00"
 
     # Calculate total seconds and remaining frames
-    total_seconds = frame_number / FPS
-    frames = frame_number % FPS
-    
-    # Calculate HH:MM:SS components
-    seconds = int(total_seconds % 60)
-    minutes = int((total_seconds // 60) % 60)
-    hours = int(total_seconds // 3600)
-    
-    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{int(frames):02d}"
+    total_seconds = frame_number // FRAMES_PER_SECOND
+    frames = frame_number - total_seconds * FRAMES_PER_SECOND
+
+    # Calculate minute index and remaining seconds
+    minute_index = total_seconds // 60
+    seconds = total_seconds - minute_index * 60
+
+    if 0 <= minute_index < len(MINUTE_STRINGS):
+        return f"{MINUTE_STRINGS[minute_index]}:{seconds:02d}.{FRAME_STRINGS[frames]}"
+
+    # Outside the lookup table (negative or 24h+), format the long way
+    hours, minutes = divmod(minute_index, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{frames:02d}"
+
+def parse_frame_number(line):
+    """Returns the frame number from a "File Frame <n>: VHS" line, or None if it isn't one."""
+    index = line.find(FRAME_PREFIX)
+    if index < 0:
+        return None
+
+    start = index + len(FRAME_PREFIX)
+    colon = line.find(":", start)
+    digits = line[start:colon]
+    if colon < 0 or not (digits.isascii() and digits.isdigit()) or not line.startswith(FRAME_SUFFIX, colon):
+        return None
+    return int(digits)
+
+def split_arguments(args):
+    """Splits a command argument string shell-style, honouring quotes."""
+    try:
+        return shlex.split(args)
+    except ValueError:
+        # Unbalanced quotes (e.g. while the user is still typing); fall back to plain whitespace
+        return args.split()
+
+def read_output_batches(stream):
+    """Reads a subprocess pipe in large chunks and yields lists of complete, stripped lines.
+
+    Lines that ended with a bare '\r' (progress redrawn in place) keep a single trailing '\r'.
+    """
+    fd = stream.fileno()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+
+    while True:
+        chunk = os.read(fd, READ_CHUNK_SIZE) # Blocks until data is available, b"" on EOF
+        if not chunk:
+            break
+
+        data = pending + decoder.decode(chunk)
+        # Hold back a trailing '\r' in case its '\n' arrives with the next chunk
+        held_cr = data.endswith("\r")
+        if held_cr:
+            data = data[:-1]
+
+        # Split into alternating line text and line break; the last piece is still incomplete
+        parts = LINE_BREAK_PATTERN.split(data)
+        pending = parts.pop()
+        if held_cr:
+            pending += "\r"
+        if parts:
+            batch = []
+            for line, line_break in zip(parts[::2], parts[1::2]):
+                stripped = line.strip()
+                # Mark lines ended by a bare '\r' so the log can redraw them in place
+                batch.append(stripped + "\r" if stripped and line_break == "\r" else stripped)
+            yield batch
+
+    pending += decoder.decode(b"", final=True)
+    if pending.strip():
+        yield [pending.strip()]
+
+# SGR foreground color codes, which double as the log area's tag names
+SGR_FG_CODES = ('30', '31', '32', '33', '34', '35', '36', '37')
+SGR_FG_COLORS = (
+    "#808080", # Black (Gray)
+    "#FF5555", # Red
+    "#55FF55", # Green
+    "#FFFF55", # Yellow
+    "#5555FF", # Blue
+    "#FF55FF", # Magenta
+    "#55FFFF", # Cyan
+    "#FFFFFF", # White
+)
+# Log color state as a small int: 0 is the default color, 1-8 are the foreground codes 30-37
+SGR_FG_STATE = {code: state for state, code in enumerate(SGR_FG_CODES, start=1)}
+# Tag tuple for each color state, shared by every text run in that state
+TAGS_FOR_STATE = [()] + [(code,) for code in SGR_FG_CODES]
+# Resets all SGR attributes
+SGR_RESET = '\x1B[0m'
 
 class VhsDecodeApp(ctk.CTk):
     """Main application window for the VHS Decode GUI."""
@@ -66,7 +182,13 @@ class VhsDecodeApp(ctk.CTk):
 
         # --- State Variables ---
         self.input_file_path = ctk.StringVar(value="")
+        # Paths derived from the input file, recomputed only when it changes
+        self.input_file_path.trace_add("write", self._on_input_path_changed)
+        self._on_input_path_changed()
         self.command_args = ctk.StringVar(value="--tf VHS --pal") 
+        # Argument list for vhs-decode, re-split only when the arguments change
+        self.command_args.trace_add("write", self._on_command_args_changed)
+        self._on_command_args_changed()
         
         # Status variables (for the dashboard)
         self.current_frame = ctk.StringVar(value="0")
@@ -88,6 +210,34 @@ class VhsDecodeApp(ctk.CTk):
         self.frame_buffer = 0 # Latest frame number received
         self.dropped_field_buffer = 0 # Count since last GUI update
         self.track_skip_buffer = 0 # Count since last GUI update
+        self._decode_buffer_lock = threading.Lock() # Buffers are written by the decode worker thread
+
+        # Canonical decode totals; the dashboard StringVars only hold their formatted text
+        self._current_frame_int = 0
+        self._dropped_field_total = 0
+        self._track_skip_total = 0
+        self._fps_ewma = None # Smoothed decode FPS, None until the first sample
+
+        # Calls queued by worker threads, drained on the GUI thread in one pass per tick
+        self._gui_queue = collections.deque()
+        self._gui_queue_lock = threading.Lock()
+
+        # Log entries (text, source, visible) waiting for the next flush; source is the worker thread
+        # ident for subprocess output or None for the app's own messages, and hidden entries only
+        # carry ANSI color codes
+        self._pending_log_lines = []
+        self._pending_log_lock = threading.Lock()
+        self._log_tokens = LOG_LINES_PER_TICK # Subprocess lines still allowed this tick
+        self._pending_shown = collections.deque() # Indices of the pending subprocess lines to be shown
+        self._suppressed_log_lines = 0 # Subprocess lines dropped since the last flush
+        self._log_lines_since_trim = 0 # Lines logged since the log area was last trimmed
+        # Log entries held back while the log area isn't visible, replayed when it is shown again
+        self._log_ring = collections.deque(maxlen=MAX_LOG_LINES)
+        self._log_scroll_pending = False # Whether an auto-scroll is already scheduled
+        self._log_redraw_source = None # Source of the progress line ending the log area, if any
+        # ANSI color state of the log, carried across lines
+        self._sgr_state = 0
+        self._tag_tuple = TAGS_FOR_STATE[0]
 
         # --- Config and Cleanup ---
         self.config_file_path = CONFIG_FILE_NAME
@@ -100,65 +250,111 @@ class VhsDecodeApp(ctk.CTk):
         self._create_log_frame()
         self._create_control_frame()
 
+        self.after(GUI_QUEUE_INTERVAL_MS, self._drain_gui_queue)
+
 
     # --- Config Management ---
 
+    def _parse_config_file(self):
+        """Reads the local config file, returning its raw lines and a dict of its key="value" settings."""
+        try:
+            with open(self.config_file_path, 'r') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return [], {} # No config yet; it will be created on save
+
+        config = {}
+        for line in lines:
+            match = CONFIG_ENTRY_PATTERN.match(line.strip())
+            if match:
+                config[match.group(1)] = match.group(2)
+        return lines, config
+
     def _load_config(self):
-        """Loads command arguments from a local config file."""
-        if os.path.exists(self.config_file_path):
-            try:
-                with open(self.config_file_path, 'r') as f:
-                    content = f.read()
-                    match = re.search(r'vhsdecodeArguments="(.*?)"', content)
-                    if match:
-                        self.command_args.set(match.group(1))
-            except Exception as e:
-                self.log_output(f"Warning: Could not load config file: {e}")
+        """Loads the config file into memory and applies the command arguments."""
+        try:
+            _, self._config = self._parse_config_file()
+        except Exception as e:
+            self._config = None # Unreadable; don't overwrite it on save
+            self.log_output(f"Warning: Could not load config file: {e}")
+            return
+
+        if DECODE_ARGS_CONFIG_KEY in self._config:
+            self.command_args.set(self._config[DECODE_ARGS_CONFIG_KEY])
 
     def _save_config(self):
-        """Saves command arguments to a local config file, preserving other settings."""
+        """Saves command arguments to a local config file, preserving other settings.
+
+        The file is written on a background thread, which is returned (None if nothing is saved).
+        """
+        if self._config is None:
+            return None
+
+        command_args = self.command_args.get()
+        if self._config.get(DECODE_ARGS_CONFIG_KEY) == command_args:
+            return None # Unchanged, nothing to write
+
+        self._config[DECODE_ARGS_CONFIG_KEY] = command_args
+        # Not a daemon thread, so the interpreter waits for the write to finish before exiting
+        save_thread = threading.Thread(target=self._write_config, args=(command_args,))
+        save_thread.start()
+        return save_thread
+
+    def _write_config(self, command_args):
+        """Writes the decode arguments into the config file (runs on a worker thread)."""
+        temp_path = f"{self.config_file_path}.tmp"
         try:
-            new_line = f'vhsdecodeArguments="{self.command_args.get()}"\n'
-            lines = []
-            if os.path.exists(self.config_file_path):
-                with open(self.config_file_path, 'r') as f:
-                    lines = f.readlines()
-            
-            updated = False
+            # Re-read the file so edits made while the app was open (e.g. export arguments) are kept
+            lines, _ = self._parse_config_file()
+
+            # Replace only the vhsdecodeArguments line; every other line is written back as it was
+            new_line = f'{DECODE_ARGS_CONFIG_KEY}="{command_args}"\n'
             for i, line in enumerate(lines):
-                if line.strip().startswith("vhsdecodeArguments="):
+                match = CONFIG_ENTRY_PATTERN.match(line.strip())
+                if match and match.group(1) == DECODE_ARGS_CONFIG_KEY:
                     lines[i] = new_line
-                    updated = True
                     break
-            
-            if not updated:
+            else:
                 if lines and not lines[-1].endswith('\n'):
                     lines.append('\n')
                 lines.append(new_line)
-            
-            with open(self.config_file_path, 'w') as f:
+
+            with open(temp_path, 'w') as f:
                 f.writelines(lines)
+            # Replace in one step so a failed write can't leave a truncated config behind
+            os.replace(temp_path, self.config_file_path)
         except Exception as e:
             self.log_output(f"Warning: Could not save config file: {e}")
 
     def _on_closing(self):
         """Handles window close event: saves config and safely closes."""
+        # Start writing the config while the subprocesses shut down
+        save_thread = self._save_config()
+
         # Attempt to terminate the running process before exiting
         if self.decoding_in_progress and self.process:
-            try:
-                self.process.terminate() 
-            except Exception:
-                pass # Process might already be dead
-            time.sleep(0.5) # Give subprocess a moment to clean up
+            self._terminate_process(self.process)
 
         if self.export_in_progress and self.export_process:
+            self._terminate_process(self.export_process)
+
+        if save_thread:
+            save_thread.join(timeout=CONFIG_SAVE_TIMEOUT)
+        self.destroy()
+
+    def _terminate_process(self, process):
+        """Terminates a subprocess, giving it a moment to clean up before killing it."""
+        try:
+            process.terminate()
+            process.wait(timeout=0.5) # Returns as soon as the process exits
+        except subprocess.TimeoutExpired:
             try:
-                self.export_process.terminate()
+                process.kill()
+                process.wait(timeout=0.2)
             except Exception:
                 pass
-
-        self._save_config()
-        self.destroy()
+        except Exception:
+            pass # Process might already be dead
 
     # --- UI Component Creation Methods ---
 
@@ -230,17 +426,12 @@ class VhsDecodeApp(ctk.CTk):
         self.log_text_area = ctk.CTkTextbox(log_frame, wrap="word", activate_scrollbars=True, text_color="white", fg_color="#2B2B2B", font=ctk.CTkFont(family="Consolas", size=11))
         self.log_text_area.grid(row=1, column=0, padx=10, pady=(0, 10), sticky="nsew")
         
-        # Configure tags for ANSI colors
-        self.log_text_area.tag_config("30", foreground="#808080") # Black (Gray)
-        self.log_text_area.tag_config("31", foreground="#FF5555") # Red
-        self.log_text_area.tag_config("32", foreground="#55FF55") # Green
-        self.log_text_area.tag_config("33", foreground="#FFFF55") # Yellow
-        self.log_text_area.tag_config("34", foreground="#5555FF") # Blue
-        self.log_text_area.tag_config("35", foreground="#FF55FF") # Magenta
-        self.log_text_area.tag_config("36", foreground="#55FFFF") # Cyan
-        self.log_text_area.tag_config("37", foreground="#FFFFFF") # White
+        # Configure tags for ANSI colors up front, so every tag the log parser emits already exists
+        for code, color in zip(SGR_FG_CODES, SGR_FG_COLORS):
+            self.log_text_area.tag_config(code, foreground=color)
         
         self.log_text_area.configure(state="disabled") # Set to read-only
+        self.bind("<Map>", self._replay_log, add="+") # Window shown again (e.g. restored after minimizing)
 
     def _create_control_frame(self):
         """Creates the main control button and status message area."""
@@ -280,6 +471,20 @@ class VhsDecodeApp(ctk.CTk):
         if file_path:
             self.input_file_path.set(file_path)
     
+    def _on_input_path_changed(self, *_):
+        """Caches the paths derived from the input file whenever it changes."""
+        input_path = self.input_file_path.get()
+        self._input_dir = os.path.dirname(input_path)
+        self._filename_only = os.path.splitext(os.path.basename(input_path))[0]
+        # Output prefix for vhs-decode (same directory, same name, plus '-Decoded', no extension)
+        self._output_prefix = os.path.join(self._input_dir, f"{self._filename_only}-Decoded")
+        self._tbc_path = f"{self._output_prefix}.tbc"
+        self._export_base = os.path.join(self._input_dir, f"{self._filename_only}-export")
+
+    def _on_command_args_changed(self, *_):
+        """Caches the split vhs-decode argument list whenever the arguments change."""
+        self._args_list = split_arguments(self.command_args.get())
+
     def _cancel_decoding(self):
         """Sends SIGTERM to the subprocess to safely stop decoding."""
         if self.decoding_in_progress and self.process:
@@ -303,12 +508,7 @@ class VhsDecodeApp(ctk.CTk):
             self.log_output("Error: No input file selected.")
             return
 
-        input_dir = os.path.dirname(input_path)
-        input_basename = os.path.basename(input_path)
-        filename_only = os.path.splitext(input_basename)[0]
-        tbc_path = os.path.join(input_dir, f"{filename_only}-Decoded.tbc")
-        
-        cmd = ["ld-analyse", tbc_path]
+        cmd = ["ld-analyse", self._tbc_path]
         self.log_output(f"--- Launching ld-analyse ---\nCommand: {' '.join(cmd)}")
         
         threading.Thread(target=self._run_generic_command, args=(cmd,), daemon=True).start()
@@ -320,7 +520,7 @@ class VhsDecodeApp(ctk.CTk):
             self.log_output("Error: No input file selected.")
             return
 
-        input_dir = os.path.dirname(input_path)
+        input_dir = self._input_dir
         
         # Find required files
         linear_flacs = glob.glob(os.path.join(input_dir, "*-linear.flac"))
@@ -334,8 +534,7 @@ class VhsDecodeApp(ctk.CTk):
             return
             
         # Heuristic: use the first match, or try to match basename
-        input_basename = os.path.basename(input_path)
-        filename_only = os.path.splitext(input_basename)[0]
+        filename_only = self._filename_only
         
         # Try to find files that contain the input filename, otherwise default to first found
         linear_flac = next((f for f in linear_flacs if filename_only in os.path.basename(f)), linear_flacs[0])
@@ -358,24 +557,15 @@ class VhsDecodeApp(ctk.CTk):
             self.log_output("Error: No input file selected.")
             return
 
-        input_dir = os.path.dirname(input_path)
-        input_basename = os.path.basename(input_path)
-        filename_only = os.path.splitext(input_basename)[0]
-        tbc_path = os.path.join(input_dir, f"{filename_only}-Decoded.tbc")
-        
+        # Read the export arguments on every click, so edits to the config file apply without a restart
         export_args = ""
-        if os.path.exists(self.config_file_path):
-            try:
-                with open(self.config_file_path, 'r') as f:
-                    content = f.read()
-                    match = re.search(r'videoExportArguments="(.*?)"', content)
-                    if match:
-                        export_args = match.group(1)
-            except Exception as e:
-                self.log_output(f"Warning: Could not read config file: {e}")
+        try:
+            _, config = self._parse_config_file()
+            export_args = config.get(EXPORT_ARGS_CONFIG_KEY, "")
+        except Exception as e:
+            self.log_output(f"Warning: Could not read config file: {e}")
 
-        output_base = os.path.join(input_dir, f"{filename_only}-export")
-        cmd = ["tbc-video-export"] + export_args.split() + [tbc_path, output_base]
+        cmd = ["tbc-video-export"] + split_arguments(export_args) + [self._tbc_path, self._export_base]
         
         self.export_in_progress = True
         self.export_button.configure(text="Cancel Export", command=self._cancel_export, fg_color="#C84040", hover_color="#A83030")
@@ -399,38 +589,35 @@ class VhsDecodeApp(ctk.CTk):
                 cmd_list,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                universal_newlines=True
+                bufsize=0 # Unbuffered; read_output_batches reads the raw pipe with os.read
             )
-            
-            progress_pattern = re.compile(r"Info:\s+(\d+)\s+frames processed\s+-\s+([\d.]+)\s+FPS")
 
-            for line in iter(self.export_process.stdout.readline, ''):
-                if line:
-                    line_stripped = line.strip()
-                    match = progress_pattern.search(line_stripped)
+
+            for lines in read_output_batches(self.export_process.stdout):
+                for line_stripped in lines:
+                    match = EXPORT_PROGRESS_PATTERN.search(line_stripped)
                     if match:
                         frames = int(match.group(1))
                         fps = float(match.group(2))
-                        self.after(0, self._update_export_status, frames, fps)
+                        self._queue_gui_call(self._update_export_status, frames, fps)
                     
-                    self.after(0, self.log_output, line_stripped)
+                    self._log_process_output(line_stripped)
+            self._end_process_output()
             
             self.export_process.stdout.close()
             return_code = self.export_process.wait()
             
-            self.after(0, self._finalize_export, return_code)
+            self._queue_gui_call(self._finalize_export, return_code)
                 
         except Exception as e:
-            self.after(0, self.log_output, f"Failed to run command: {e}")
-            self.after(0, self._finalize_export, -1)
+            self.log_output(f"Failed to run command: {e}")
+            self._queue_gui_call(self._finalize_export, -1)
 
     def _update_export_status(self, frames, fps):
         """Updates the status dashboard with export progress."""
-        self.current_frame.set(f"{frames:,}")
-        self.decode_fps.set(f"{fps:.2f}")
-        self.timecode.set(convert_frame_to_timecode(frames))
+        self._set_if_changed(self.current_frame, f"{frames:,}")
+        self._set_if_changed(self.decode_fps, f"{fps:.2f}")
+        self._set_if_changed(self.timecode, convert_frame_to_timecode(frames))
 
     def _finalize_export(self, return_code):
         """Resets UI after export finishes."""
@@ -450,25 +637,48 @@ class VhsDecodeApp(ctk.CTk):
                 cmd_list,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                universal_newlines=True
+                bufsize=0 # Unbuffered; read_output_batches reads the raw pipe with os.read
             )
             
-            for line in iter(process.stdout.readline, ''):
-                if line:
-                    self.after(0, self.log_output, line.strip())
+            for lines in read_output_batches(process.stdout):
+                for line in lines:
+                    self._log_process_output(line)
+            self._end_process_output()
             
             process.stdout.close()
             return_code = process.wait()
             
             if return_code != 0:
-                self.after(0, self.log_output, f"Process finished with error code {return_code}")
+                self.log_output(f"Process finished with error code {return_code}")
             else:
-                self.after(0, self.log_output, "Process finished successfully.")
+                self.log_output("Process finished successfully.")
                 
         except Exception as e:
-            self.after(0, self.log_output, f"Failed to run command: {e}")
+            self.log_output(f"Failed to run command: {e}")
+
+    def _queue_gui_call(self, callback, *args):
+        """Queues a callback to run on the GUI thread (safe to call from worker threads)."""
+        with self._gui_queue_lock:
+            self._gui_queue.append((callback, args))
+
+    def _drain_gui_queue(self):
+        """Runs every queued callback and flushes the log in one pass, then reschedules itself."""
+        with self._gui_queue_lock:
+            pending = self._gui_queue
+            self._gui_queue = collections.deque()
+
+        try:
+            for callback, args in pending:
+                try:
+                    callback(*args)
+                except Exception:
+                    # Report it like Tk would, without dropping the callbacks after it
+                    self.report_callback_exception(*sys.exc_info())
+            self._flush_log()
+        finally:
+            with self._pending_log_lock:
+                self._log_tokens = LOG_LINES_PER_TICK # Refill for the next tick
+            self.after(GUI_QUEUE_INTERVAL_MS, self._drain_gui_queue)
 
     def _start_decoding(self):
         """Prepares state and starts the decoding process in a separate thread."""
@@ -485,6 +695,11 @@ class VhsDecodeApp(ctk.CTk):
         self.log_text_area.configure(state="normal")
         self.log_text_area.delete("1.0", END)
         self.log_text_area.configure(state="disabled")
+        self._log_lines_since_trim = 0
+        self._log_ring.clear()
+        self._log_redraw_source = None
+        self._sgr_state = 0
+        self._tag_tuple = TAGS_FOR_STATE[0]
         
         self.current_frame.set("0")
         self.timecode.set("00:00:00.00")
@@ -496,12 +711,8 @@ class VhsDecodeApp(ctk.CTk):
         # 2. Build Command & Calculate Output Path
         args = self.command_args.get().strip()
         
-        # Calculate Output Path (same directory, same name, plus '-Decoded', no extension)
-        input_dir = os.path.dirname(input_path)
-        input_basename = os.path.basename(input_path)
-        filename_only = os.path.splitext(input_basename)[0]
-        output_filename = f"{filename_only}-Decoded"
-        output_path = os.path.join(input_dir, output_filename)
+        # Output Path (same directory, same name, plus '-Decoded', no extension)
+        output_path = self._output_prefix
         
         # The full command structure is: vhs-decode [args] [input_file] [output_prefix]
         full_command_display = f"{VHS_DECODE_COMMAND} {args} \"{input_path}\" \"{output_path}\""
@@ -517,6 +728,10 @@ class VhsDecodeApp(ctk.CTk):
         self.frame_buffer = 0
         self.dropped_field_buffer = 0
         self.track_skip_buffer = 0
+        self._current_frame_int = 0
+        self._dropped_field_total = 0
+        self._track_skip_total = 0
+        self._fps_ewma = None
         
         self.decoding_in_progress = True
         self.start_button.configure(text="Decoding...", state="disabled", fg_color="#3E3E3E", text_color="white")
@@ -524,16 +739,14 @@ class VhsDecodeApp(ctk.CTk):
 
         # Pass the arguments and paths explicitly to the thread function
         self.decode_thread = threading.Thread(target=self._run_decode_process, 
-                                             args=(args, input_path, output_path), 
+                                             args=(self._args_list, input_path, output_path), 
                                              daemon=True)
         self.decode_thread.start()
 
-    def _run_decode_process(self, args, input_path, output_path):
-        """Executes vhs-decode and reads its output line by line."""
+    def _run_decode_process(self, user_args_list, input_path, output_path):
+        """Executes vhs-decode and reads its output in bulk."""
         try:
             # The structure must be: [vhs-decode] + [user args] + [input file path] + [output file prefix]
-            user_args_list = args.split()
-            
             # Construct the final command list: [vhs-decode, arg1, arg2, ..., input_path, output_path]
             command_list = [VHS_DECODE_COMMAND] + user_args_list + [input_path] + [output_path]
 
@@ -541,92 +754,112 @@ class VhsDecodeApp(ctk.CTk):
                 command_list,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT, # Merge stdout and stderr for single log
-                text=True,
-                bufsize=1,
-                universal_newlines=True # Ensure output is read as text
+                bufsize=0 # Unbuffered; read_output_batches reads the raw pipe with os.read
             )
 
-            # Read output line by line until EOF
-            for line in iter(self.process.stdout.readline, ''):
-                # Use self.after to safely update the GUI from the worker thread
-                self.after(0, self._process_output_line, line.strip()) 
+            # Read output in bulk until EOF, parsing it here so the GUI thread only sees the results
+            for lines in read_output_batches(self.process.stdout):
+                for line in lines:
+                    self._process_output_line(line)
+            self._end_process_output()
             
             # Wait for the process to finish
             self.process.stdout.close()
             return_code = self.process.wait()
 
             # Schedule final status update on main thread
-            self.after(0, self._finalize_decoding, return_code)
+            self._queue_gui_call(self._finalize_decoding, return_code)
 
         except FileNotFoundError:
             # Handle case where vhs-decode is not in the PATH
-            self.after(0, self._finalize_decoding, -1, f"Error: '{VHS_DECODE_COMMAND}' not found. Ensure it is installed and in your system PATH.")
+            self._queue_gui_call(self._finalize_decoding, -1, f"Error: '{VHS_DECODE_COMMAND}' not found. Ensure it is installed and in your system PATH.")
         except Exception as e:
             # Handle other unexpected errors
-            self.after(0, self._finalize_decoding, -1, f"An unexpected error occurred: {type(e).__name__}: {e}")
+            self._queue_gui_call(self._finalize_decoding, -1, f"An unexpected error occurred: {type(e).__name__}: {e}")
 
     def _update_gui_status(self, current_frame):
         """Safely updates all GUI status indicators using accumulated data and resets buffers."""
         current_time = time.time()
         
         # 1. Update frame and timecode
-        self.current_frame.set(f"{current_frame:,}")
-        self.timecode.set(convert_frame_to_timecode(current_frame))
+        self._current_frame_int = current_frame
+        self._set_if_changed(self.current_frame, f"{current_frame:,}")
+        self._set_if_changed(self.timecode, convert_frame_to_timecode(current_frame))
+
+        # Take the counts buffered by the worker thread
+        with self._decode_buffer_lock:
+            dropped_fields = self.dropped_field_buffer
+            track_skips = self.track_skip_buffer
+            self.dropped_field_buffer = 0
+            self.track_skip_buffer = 0
 
         # 2. Update Dropped Field Count
-        current_dropped = int(self.dropped_field_count.get())
-        self.dropped_field_count.set(str(current_dropped + self.dropped_field_buffer))
-        self.dropped_field_buffer = 0
+        self._dropped_field_total += dropped_fields
+        self._set_if_changed(self.dropped_field_count, f"{self._dropped_field_total}")
 
         # 3. Update Track Skip Count
-        current_skip = int(self.track_skip_count.get())
-        self.track_skip_count.set(str(current_skip + self.track_skip_buffer))
-        self.track_skip_buffer = 0
+        self._track_skip_total += track_skips
+        self._set_if_changed(self.track_skip_count, f"{self._track_skip_total}")
         
-        # 4. Update FPS
+        # 4. Update FPS (smoothed, so the display doesn't jitter between updates)
         frame_diff = current_frame - self.last_frame
         time_diff = current_time - self.last_time
 
         if time_diff > 0:
             fps = frame_diff / time_diff
-            self.decode_fps.set(f"{fps:.2f}")
+            if self._fps_ewma is None:
+                self._fps_ewma = fps
+            else:
+                self._fps_ewma = (1 - FPS_SMOOTHING) * self._fps_ewma + FPS_SMOOTHING * fps
+            self._set_if_changed(self.decode_fps, f"{self._fps_ewma:.2f}")
 
-        # Reset tracking variables for FPS calculation and throttling timer
+        # Reset tracking variables for FPS calculation
         self.last_frame = current_frame
         self.last_time = current_time
-        self.last_gui_update_time = current_time
+
+    def _set_if_changed(self, variable, value):
+        """Sets a dashboard variable only when its text changes, avoiding redundant redraws."""
+        if variable.get() != value:
+            variable.set(value)
 
     def _process_output_line(self, line):
-        """Analyzes a single line of output and updates state or the log, applying 5-second throttling."""
+        """Analyzes a single line of output on the decode worker thread, applying 5-second throttling.
+
+        Updates the buffers or the log; the dashboard itself is only updated on the GUI thread.
+        """
         if not line:
             return
 
-        frame_found = False
-        
-        # 1. Frame and Timecode Parsing
-        frame_match = FRAME_PATTERN.search(line)
-        if frame_match:
-            current_frame = int(frame_match.group(1))
+        # Cheap substring checks run first so most lines never reach the regex engine
+        # 1. Dropped Field Count
+        if DROPPED_FIELD_PATTERN in line:
+            with self._decode_buffer_lock:
+                self.dropped_field_buffer += 1
+            self._log_process_output(line, visible=False)
+            return
+
+        # 2. Track Skip Count
+        if TRACK_SKIP_PATTERN in line:
+            with self._decode_buffer_lock:
+                self.track_skip_buffer += 1
+            self._log_process_output(line, visible=False)
+            return
+
+        # 3. Frame and Timecode Parsing (plain string slicing, no regex)
+        current_frame = parse_frame_number(line)
+        if current_frame is not None:
             self.frame_buffer = current_frame # Always track the latest frame number
-            frame_found = True
-            
-        # 2. Dropped Field Count
-        # Check if the line contains the new, more general pattern
-        elif DROPPED_FIELD_PATTERN in line:
-            self.dropped_field_buffer += 1
-            
-        # 3. Track Skip Count
-        # Check if the line contains the new, more general pattern
-        elif TRACK_SKIP_PATTERN in line:
-            self.track_skip_buffer += 1
-            
-        # 4. General Log
-        else:
-            self.log_output(line)
 
-        # Check for throttling (only attempt update if we've seen a frame and 5 seconds passed)
-        if frame_found and (time.time() - self.last_gui_update_time >= 5.0):
-            self._update_gui_status(self.frame_buffer)
+            # Check for throttling (only schedule an update if 5 seconds passed)
+            current_time = time.time()
+            if current_time - self.last_gui_update_time >= 5.0:
+                self.last_gui_update_time = current_time
+                self._queue_gui_call(self._update_gui_status, current_frame)
+            self._log_process_output(line, visible=False)
+            return
+
+        # 4. General Log
+        self._log_process_output(line)
 
 
     def _finalize_decoding(self, return_code, error_message=None):
@@ -645,7 +878,7 @@ class VhsDecodeApp(ctk.CTk):
         elif return_code == 0:
             # Calculate final average FPS upon success
             total_time = time.time() - self.start_time
-            total_frames = int(self.current_frame.get().replace(',', ''))
+            total_frames = self._current_frame_int
             
             if total_time > 0 and total_frames > 0:
                  final_fps = total_frames / total_time
@@ -666,40 +899,241 @@ class VhsDecodeApp(ctk.CTk):
             self.log_output(f"\n--- DECODING FINISHED WITH NON-ZERO EXIT CODE: {return_code} ---")
 
     def log_output(self, text):
-        """Appends text to the read-only log area and scrolls to the bottom."""
-        self.log_text_area.configure(state="normal")
-        
-        # Split by ANSI SGR codes (colors)
-        parts = re.split(r'(\x1B\[[\d;]*m)', text)
-        current_tags = []
-        
-        for part in parts:
-            if not part:
+        """Queues text for the log area (safe to call from worker threads); shown uncolored on the next flush."""
+        with self._pending_log_lock:
+            self._pending_log_lines.append((text, None, True))
+
+    def _log_process_output(self, text, visible=True):
+        """Queues a line of subprocess output for the log area, rate limited to LOG_LINES_PER_TICK.
+
+        Once the limit is reached the newest lines are kept, so the end of a burst (often an error)
+        stays visible. Lines that aren't shown (suppressed, or consumed by the dashboard) still pass
+        on their ANSI color codes, so a reset on such a line isn't lost.
+        """
+        if not visible and '\x1B[' not in text:
+            return # Nothing to show and no color codes to track
+
+        source = threading.get_ident() # Each subprocess is read by its own worker thread
+        with self._pending_log_lock:
+            pending = self._pending_log_lines
+            if visible:
+                if self._log_tokens > 0:
+                    self._log_tokens -= 1
+                elif self._pending_shown:
+                    # Over the limit: the oldest pending line makes room for this one
+                    index = self._pending_shown.popleft()
+                    old_text, old_source, _ = pending[index]
+                    pending[index] = (old_text, old_source, False) if '\x1B[' in old_text else None
+                    self._suppressed_log_lines += 1
+                else:
+                    # The lines allowed this tick were already flushed
+                    self._suppressed_log_lines += 1
+                    if '\x1B[' not in text:
+                        return
+                    visible = False
+            if visible:
+                self._pending_shown.append(len(pending))
+            pending.append((text, source, visible))
+
+    def _end_process_output(self):
+        """Resets the log color after a subprocess's output ends, so later output doesn't inherit it."""
+        self._log_process_output(SGR_RESET, visible=False)
+
+    def _parse_ansi_segments(self, text):
+        """Splits a log line into (clean_text, tags) segments using its ANSI SGR color codes.
+
+        Color state carries over from earlier lines until reset. The line is terminated with an
+        untagged newline segment.
+        """
+        # Fast path: most lines have no escapes at all, so reuse the current tags without parsing
+        if '\x1B' not in text:
+            yield text, self._tag_tuple
+            yield "\n", ()
+            return
+
+        # Single pass over the line with str.find: text runs are yielded, escape sequences consumed
+        length = len(text)
+        position = 0
+        while position < length:
+            escape = text.find('\x1B', position)
+            if escape < 0:
+                yield text[position:], self._tag_tuple
+                break
+            if escape > position:
+                yield text[position:escape], self._tag_tuple
+
+            # Lone or unterminated escapes only drop the ESC byte itself
+            position = escape + 1
+            if not text.startswith('[', position):
                 continue
-            
-            if part.startswith('\x1B['):
-                # Parse SGR code
-                try:
-                    content = part[2:-1]
-                    codes = content.split(';')
-                    for code in codes:
-                        if code == '0' or code == '':
-                            current_tags = []
-                        elif code in ['30', '31', '32', '33', '34', '35', '36', '37']:
-                            # Remove existing color tags
-                            current_tags = [t for t in current_tags if t not in ['30', '31', '32', '33', '34', '35', '36', '37']]
-                            current_tags.append(code)
-                except Exception:
+
+            # Control sequence: ESC [ <parameter bytes 0-?> <intermediate bytes space-/> <final byte @-~>
+            end = position + 1
+            while end < length and '0' <= text[end] <= '?':
+                end += 1
+            parameters_end = end
+            while end < length and ' ' <= text[end] <= '/':
+                end += 1
+            if end < length and '@' <= text[end] <= '~':
+                if text[end] == 'm' and parameters_end == end:
+                    self._apply_sgr(text[position + 1:end])
+                position = end + 1 # Other control sequences are dropped
+
+        yield "\n", ()
+
+    def _apply_sgr(self, parameters):
+        """Updates the log's color state from the parameters of an SGR sequence (e.g. '1;32')."""
+        # Fast paths: resets (ESC[0m / ESC[m) and single codes (ESC[32m) make up most SGR sequences
+        if parameters == '0' or parameters == '':
+            self._sgr_state = 0
+            self._tag_tuple = TAGS_FOR_STATE[0]
+            return
+        if ';' not in parameters:
+            # Unknown or non-SGR single codes leave the state unchanged
+            self._sgr_state = SGR_FG_STATE.get(parameters, self._sgr_state)
+            self._tag_tuple = TAGS_FOR_STATE[self._sgr_state]
+            return
+
+        if parameters.strip('0123456789;'):
+            return # Not a plain SGR sequence
+
+        # Parse SGR codes (validated above, so nothing here can raise)
+        state = self._sgr_state
+        for code in parameters.split(';'):
+            if code == '0' or code == '':
+                state = 0
+            else:
+                # A foreground code replaces the current color; other codes leave it alone
+                state = SGR_FG_STATE.get(code, state)
+        self._sgr_state = state
+        self._tag_tuple = TAGS_FOR_STATE[state]
+
+    def _flush_log(self):
+        """Inserts all pending log lines with one widget update, then scrolls to the bottom."""
+        with self._pending_log_lock:
+            batch = self._pending_log_lines
+            suppressed = self._suppressed_log_lines
+            first_shown = self._pending_shown[0] if self._pending_shown else len(batch)
+            self._pending_shown = collections.deque()
+            self._pending_log_lines = []
+            self._suppressed_log_lines = 0
+
+        if suppressed:
+            # The notice goes before the kept lines; dropped lines were left as None
+            batch.insert(first_shown, (f"... {suppressed:,} lines suppressed ...", None, True))
+            batch = [entry for entry in batch if entry is not None]
+
+        # Nobody can see the log area (e.g. window minimized), so skip parsing and inserting for now
+        if not self.log_text_area.winfo_viewable():
+            self._log_ring.extend(batch)
+            return
+
+        # Visible again: lines held back while hidden go first
+        if self._log_ring:
+            batch[:0] = self._log_ring
+            self._log_ring.clear()
+
+        if not batch:
+            return
+
+        # A progress line ending in '\r' is redrawn in place, so the next line shown by the same
+        # subprocess replaces it; anything else (e.g. an app message) starts a new line below it
+        entries = []
+        last_shown = None # Index of the last visible entry
+        redraw_source = self._log_redraw_source
+        redraw_index = None # Index of the pending progress line, None while it's in the log area
+        delete_last_line = False
+        for entry in batch:
+            text, source, visible = entry
+            if visible:
+                if redraw_source is not None and source == redraw_source:
+                    if redraw_index is None:
+                        delete_last_line = True
+                    else:
+                        progress_text = entries[redraw_index][0]
+                        entries[redraw_index] = (progress_text, source, False) # Hidden, but its color codes still apply
+                if source is not None and text.endswith("\r"):
+                    redraw_source, redraw_index = source, len(entries)
+                else:
+                    redraw_source = None
+                last_shown = len(entries)
+            entries.append(entry)
+
+        # Strip the whole batch into one string, recording the character span of each colored run
+        segments = []
+        spans = [] # [tags, start_offset, end_offset]
+        offset = 0
+        line_count = 0
+        for text, source, visible in entries:
+            if not visible:
+                for _ in self._parse_ansi_segments(text): # Only update the color state
                     pass
+                continue
+            if source is None:
+                # The app's own messages are shown uncolored and leave the color state alone
+                parsed = ((text, ()), ("\n", ()))
             else:
-                # Text content - strip other ANSI codes
-                clean_text = ANSI_ESCAPE_PATTERN.sub('', part)
-                if clean_text:
-                    self.log_text_area.insert(END, clean_text, tuple(current_tags))
+                parsed = self._parse_ansi_segments(text.rstrip("\r"))
+            for segment, tags in parsed:
+                end = offset + len(segment)
+                if tags:
+                    if spans and spans[-1][0] == tags and spans[-1][2] == offset:
+                        spans[-1][2] = end # Extend the adjacent run with the same tags
+                    else:
+                        spans.append([tags, offset, end])
+                segments.append(segment)
+                offset = end
+            line_count += text.count("\n") + 1
+
+        if last_shown is None:
+            return # Only color codes, nothing to insert
+
+        self.log_text_area.configure(state="normal")
+        if delete_last_line:
+            # The last line in the log area is a progress line redrawn by this batch; replace it
+            self.log_text_area.delete("end-1c -1l linestart", "end-1c")
+        self._log_redraw_source = redraw_source
+
+        start_index = self.log_text_area.index("end-1c")
+        self.log_text_area.insert(END, "".join(segments))
+        for tags, span_start, span_end in spans:
+            for tag in tags:
+                self.log_text_area.tag_add(tag, f"{start_index}+{span_start}c", f"{start_index}+{span_end}c")
+
+        # Periodically drop the oldest lines so the log area can't grow without bound
+        self._log_lines_since_trim += line_count
+        if self._log_lines_since_trim >= LOG_TRIM_INTERVAL:
+            self._trim_log()
 
-        self.log_text_area.insert(END, "\n")
-        self.log_text_area.see(END) # Auto-scroll
         self.log_text_area.configure(state="disabled")
+        self._schedule_log_scroll()
+
+    def _schedule_log_scroll(self):
+        """Schedules a single deferred auto-scroll to the bottom of the log area."""
+        if not self._log_scroll_pending:
+            self._log_scroll_pending = True
+            self.after(LOG_SCROLL_DELAY_MS, self._scroll_log_end)
+
+    def _scroll_log_end(self):
+        """Scrolls the log area to the bottom."""
+        self._log_scroll_pending = False
+        self.log_text_area.see(END) # Auto-scroll
+
+    def _replay_log(self, event=None):
+        """Flushes the log lines held back while the log area was hidden, without waiting for the next tick."""
+        # Child widgets also carry the window's bindings, so only react to the window itself
+        if event is not None and event.widget is not self:
+            return
+        if self._log_ring:
+            self._flush_log()
+
+    def _trim_log(self):
+        """Deletes the oldest lines of the log area beyond MAX_LOG_LINES (widget must be writable)."""
+        self._log_lines_since_trim = 0
+        line_count = int(self.log_text_area.index("end-1c").split(".")[0])
+        excess = line_count - MAX_LOG_LINES
+        if excess > 0:
+            self.log_text_area.delete("1.0", f"{excess + 1}.0")
 
 # Standard Python entry point
 if __name__ == "__main__":